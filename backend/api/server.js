@@ -97,9 +97,7 @@ function decodeTemperature(encoded) {
 /**
  * Parse binary packet data
  */
-function parsePacket(base64Data, packetType) {
-  const buffer = Buffer.from(base64Data, 'base64');
-  
+function parsePacket(buffer, packetType) {
   if (packetType === 1) {
     // Real-time data packet (10 bytes)
     if (buffer.length < 10) return null;
@@ -176,9 +174,12 @@ app.get('/health', (req, res) => {
   res.json({ status: 'ok', timestamp: new Date().toISOString() });
 });
 
-// Receive sensor data from ESP32
-app.post('/api/sensor-data', async (req, res) => {
-  const { device_id, packet_type, data, timestamp, frame_counter, rssi } = req.body;
+/**
+ * Validate and store one sensor packet forwarded by the gateway
+ * Returns { code, body } describing the HTTP response for this packet
+ */
+async function storeSensorPacket(packet) {
+  const { device_id, packet_type, data, timestamp, frame_counter, rssi } = packet;
   
   console.log(`📡 Received packet from ${device_id}: Type ${packet_type}, Frame ${frame_counter}`);
   
@@ -188,19 +189,19 @@ app.post('/api/sensor-data', async (req, res) => {
   
   if (lastFrame !== undefined && lastFrame === frame_counter) {
     console.log(`  ⏭️  DUPLICATE packet skipped (Frame ${frame_counter} already processed)`);
-    return res.json({ 
-      status: 'duplicate', 
-      message: 'Packet already processed',
-      frame_counter 
-    });
+    return {
+      code: 200,
+      body: { status: 'duplicate', message: 'Packet already processed', frame_counter }
+    };
   }
   
   try {
-    // Parse the base64 encoded data
-    const parsedData = parsePacket(data, packet_type);
+    // Data is base64 encoded in JSON requests, raw bytes on the binary route
+    const rawData = Buffer.isBuffer(data) ? data : Buffer.from(data, 'base64');
+    const parsedData = parsePacket(rawData, packet_type);
     
     if (!parsedData) {
-      return res.status(400).json({ error: 'Invalid packet data' });
+      return { code: 400, body: { error: 'Invalid packet data' } };
     }
     
     // Ensure device exists
@@ -218,7 +219,7 @@ app.post('/api/sensor-data', async (req, res) => {
     await pool.query(
       `INSERT INTO packet_log (device_id, packet_type, raw_data, data_length, frame_counter, rssi)
        VALUES ($1, $2, $3, $4, $5, $6)`,
-      [device_id, packet_type, Buffer.from(data, 'base64'), Buffer.from(data, 'base64').length, frame_counter, rssi]
+      [device_id, packet_type, rawData, rawData.length, frame_counter, rssi]
     );
     
     // Store data based on packet type
@@ -365,12 +366,64 @@ app.post('/api/sensor-data', async (req, res) => {
       }).catch(err => console.error('Failed to send fall event alert:', err));
     }
     
-    res.json({ status: 'success', message: 'Data stored successfully' });
+    return { code: 200, body: { status: 'success', message: 'Data stored successfully' } };
     
   } catch (error) {
     console.error('❌ Error processing data:', error);
-    res.status(500).json({ error: 'Internal server error', details: error.message });
+    return { code: 500, body: { error: 'Internal server error', details: error.message } };
+  }
+}
+
+// Receive sensor data from ESP32
+app.post('/api/sensor-data', async (req, res) => {
+  const result = await storeSensorPacket(req.body);
+  res.status(result.code).json(result.body);
+});
+
+// Receive one sensor packet as raw bytes, with its metadata in X-* headers
+app.post('/api/sensor-data/binary', bodyParser.raw({ type: 'application/octet-stream' }), async (req, res) => {
+  if (!Buffer.isBuffer(req.body)) {
+    return res.status(400).json({ error: 'Expected application/octet-stream body' });
+  }
+  
+  // Device ID is percent-encoded by the gateway so any ID fits in a header
+  let device_id;
+  try {
+    device_id = decodeURIComponent(req.get('X-Device-Id') || '');
+  } catch (error) {
+    return res.status(400).json({ error: 'Invalid X-Device-Id header' });
+  }
+  
+  const result = await storeSensorPacket({
+    device_id,
+    packet_type: parseInt(req.get('X-Packet-Type'), 10),
+    data: req.body,
+    timestamp: req.get('X-Timestamp'),
+    frame_counter: parseInt(req.get('X-Frame-Counter'), 10),
+    rssi: parseInt(req.get('X-RSSI'), 10)
+  });
+  res.status(result.code).json(result.body);
+});
+
+// Receive a batch of sensor packets from the gateway in one request
+app.post('/api/sensor-data/batch', async (req, res) => {
+  if (!Array.isArray(req.body)) {
+    return res.status(400).json({ error: 'Expected an array of packets' });
   }
+  
+  // Store in order so duplicate detection sees frame counters as they arrived
+  const results = [];
+  for (const packet of req.body) {
+    if (!packet || typeof packet !== 'object') {
+      results.push({ code: 400, error: 'Invalid packet data' });
+      continue;
+    }
+    const result = await storeSensorPacket(packet);
+    results.push({ code: result.code, ...result.body });
+  }
+  
+  const failed = results.filter(result => result.code !== 200).length;
+  res.json({ status: failed ? 'partial' : 'success', stored: results.length - failed, failed, results });
 });
 
 // Get latest vitals for all devices
@@ -753,6 +806,8 @@ app.listen(PORT, '0.0.0.0', () => {
   
   console.log(`\n📋 Available endpoints:`);
   console.log(`   POST   /api/sensor-data - Receive data from ESP32`);
+  console.log(`   POST   /api/sensor-data/binary - Receive raw packet bytes from gateway`);
+  console.log(`   POST   /api/sensor-data/batch - Receive batched data from gateway`);
   console.log(`   GET    /api/vitals/latest - Get latest vitals`);
   console.log(`   GET    /api/realtime/:device_id - Get real-time data`);
   console.log(`   GET    /api/ecg/:device_id - Get ECG data`);
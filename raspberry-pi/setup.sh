@@ -34,11 +34,11 @@ sudo apt-get install -y \
 
 # Install Python packages
 echo "[3/8] Installing Python packages..."
-pip3 install --user pyserial requests --break-system-packages
+pip3 install --user pyserial requests orjson --break-system-packages
 
 # Install Python packages for root (required for systemd service)
 echo "Installing Python packages for system (root)..."
-sudo pip3 install pyserial requests --break-system-packages
+sudo pip3 install pyserial requests orjson --break-system-packages
 
 # Configure UART
 echo "[4/8] Configuring UART..."
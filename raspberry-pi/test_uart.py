@@ -27,10 +27,10 @@ def test_uart_loopback():
         ser.write(test_message)
         ser.flush()
         
-        time.sleep(0.1)
+        # Blocks until the echo arrives or the 2 s port timeout expires
+        received = ser.read(len(test_message))
         
-        if ser.in_waiting > 0:
-            received = ser.read(ser.in_waiting)
+        if received:
             print(f"Received: {received}")
             
             if received == test_message:
@@ -55,7 +55,7 @@ def test_uart_receive():
     print("Press Ctrl+C to stop\n")
     
     try:
-        ser = serial.Serial(UART_PORT, UART_BAUDRATE, timeout=1)
+        ser = serial.Serial(UART_PORT, UART_BAUDRATE, timeout=0.1)
         print(f"✅ Opened {UART_PORT} at {UART_BAUDRATE} baud")
         print("Waiting for data...\n")
         
@@ -63,8 +63,9 @@ def test_uart_receive():
         bytes_received = 0
         
         while True:
-            if ser.in_waiting > 0:
-                data = ser.read(ser.in_waiting)
+            # Returns whatever arrived within the timeout (blocks in the kernel)
+            data = ser.read(4096)
+            if data:
                 bytes_received += len(data)
                 
                 print(f"[{time.time() - start_time:.2f}s] Received {len(data)} bytes:")
@@ -72,8 +73,6 @@ def test_uart_receive():
                 print(f"  ASCII: {data}")
                 print()
             
-            time.sleep(0.1)
-            
     except KeyboardInterrupt:
         print(f"\n\nStopped. Received {bytes_received} bytes total")
         ser.close()
@@ -21,13 +21,24 @@ Date: 2025
 
 import serial
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import orjson
 import base64
 import time
 import sys
 import signal
 import os
+import traceback
+import queue
+import threading
+import selectors
+import struct
+import re
+import logging
+import logging.handlers
 from datetime import datetime
+from urllib.parse import quote
 
 # ============================================================================
 # Configuration
@@ -35,15 +46,73 @@ from datetime import datetime
 UART_PORT = '/dev/ttyS0'  # Change to /dev/ttyAMA0 if using Raspberry Pi 3/4
 UART_BAUDRATE = 115200
 UART_TIMEOUT = 1
+UART_READ_SIZE = 4096  # Max bytes drained from the driver per read
+
+# Minimum seconds between full tracebacks for unexpected reader errors
+TRACEBACK_INTERVAL = 5
 
 # Backend server configuration (use environment variables)
 SERVER_IP = os.getenv('SERVER_IP', 'localhost')  # Default to localhost
 SERVER_PORT = os.getenv('SERVER_PORT', '5000')
 SERVER_URL = f'http://{SERVER_IP}:{SERVER_PORT}/api/sensor-data'
+SERVER_BINARY_URL = f'{SERVER_URL}/binary'
+SERVER_BATCH_URL = f'{SERVER_URL}/batch'
+
+# Log level: INFO prints one line per packet, DEBUG adds upload/time sync details
+LOG_LEVEL = os.getenv('LORA_LOG', 'INFO').upper()
+if not isinstance(logging.getLevelName(LOG_LEVEL), int):  # Unknown names map to a string
+    print(f"⚠️  Unknown LORA_LOG level {LOG_LEVEL!r}, using INFO")
+    LOG_LEVEL = 'INFO'
+
+# Packet header: [Device ID (10 bytes)] [Frame Counter (2 bytes, LE)] [Port (1 byte)]
+PACKET_HEADER = struct.Struct('<10sHB')
+
+# LoRa port number -> packet type name (indexed by the port byte, 0-255)
+PACKET_TYPE_NAMES = ("Unknown", "Realtime", "ECG", "Fall Event") + ("Unknown",) * 252
+# LoRa port number -> minimum payload size the server accepts (0 = unknown port)
+PACKET_PAYLOAD_SIZES = (0, 10, 65, 45) + (0,) * 252
+
+# LoRa frame from Vision Master: [0xAA][LEN][RSSI][SNR][DATA (LEN bytes)][0x55]
+# Start byte followed by a plausible length (>= 13, the packet header size)
+FRAME_START_PATTERN = re.compile(rb'\xAA[\x0d-\xff]..', re.DOTALL)
+FRAME_HEADER = struct.Struct('<xBBB')  # [0xAA] skipped, LEN, RSSI, SNR
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+FRAME_END = 0x55
+RSSI_OFFSET = 150  # Vision Master sends RSSI + 150 and SNR + 20 as unsigned bytes
+SNR_OFFSET = 20
+
+# Time sync format: [0xFF][0xFE][YY][YY][MM][DD][HH][MM][SS][0xFD]
+# Start/end markers are fixed, only the date/time fields after them change
+TIME_SYNC_FIELDS = struct.Struct('>HBBBBB')
+TIME_SYNC_FIELDS_OFFSET = 2
+TIME_SYNC_MIN_INTERVAL = 1.0  # Seconds between time syncs
+
+# Packets waiting to be uploaded, filled by the UART reader thread
+UPLOAD_QUEUE_SIZE = 256
+UPLOAD_BATCH_SIZE = 32  # Max packets per batch POST
 
 # Global variables
 ser = None
 running = True
+reader_thread = None
+next_time_sync = 0.0  # time.monotonic() deadline for the next time sync
+upload_queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+time_sync_packet = bytearray(b'\xFF\xFE' + bytes(TIME_SYNC_FIELDS.size) + b'\xFD')
+timestamp_cache = (0, '')  # (epoch second, ISO 8601)
+
+# Per-packet logging goes through a queue so console writes happen on the
+# listener thread instead of stalling the UART reader
+log_queue = queue.SimpleQueue()
+log = logging.getLogger('lora')
+log.setLevel(LOG_LEVEL)
+log.propagate = False
+log.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+
+# One HTTP session for all requests so the server connection is kept alive
+session = requests.Session()
+session.headers.update({'Content-Type': 'application/json'})
+session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
 stats = {
     'packets_received': 0,
     'packets_sent': 0,
@@ -52,39 +121,83 @@ stats = {
     'time_syncs_sent': 0
 }
 
+def enable_low_latency(port):
+    """
+    Put the UART driver into low-latency mode
+    
+    The driver then pushes received bytes to the tty layer immediately
+    instead of batching them. Not every UART driver supports this; failure
+    is reported and ignored.
+    """
+    try:
+        port.set_low_latency_mode(True)
+        print("✅ UART low-latency mode enabled")
+    except (ValueError, OSError) as e:
+        print(f"⚠️  UART low-latency mode not supported: {e}")
+
 def send_time_sync():
-    """Send current time to Vision Master E213 (sent with every packet)"""
-    global ser, stats
+    """Send current time to Vision Master E213 (after packets, at most once per second)"""
+    global ser, stats, next_time_sync
     
     if not ser or not ser.is_open:
         return
     
+    # Each write competes with RX on the half-duplex link, skip if we just synced
+    now_mono = time.monotonic()
+    if now_mono < next_time_sync:
+        return
+    
     try:
-        now = datetime.now()
-        # Time sync format: [0xFF][0xFE][YY][YY][MM][DD][HH][MM][SS][0xFD]
-        time_packet = bytearray([
-            0xFF, 0xFE,
-            (now.year >> 8) & 0xFF, now.year & 0xFF,
-            now.month, now.day,
-            now.hour, now.minute, now.second,
-            0xFD
-        ])
+        # Year, month, day, hour, minute, second written into the template
+        now = time.localtime()[:6]
+        TIME_SYNC_FIELDS.pack_into(time_sync_packet, TIME_SYNC_FIELDS_OFFSET, *now)
         
-        ser.write(time_packet)
+        # Fixed 10-byte packet: write it to the fd directly, skipping
+        # pyserial's write loop
+        written = os.write(ser.fileno(), time_sync_packet)
+        if written != len(time_sync_packet):
+            # Non-blocking fd took only part of it, retry after the next packet
+            log.warning("⚠️  Time sync truncated (%d of %d bytes written)",
+                        written, len(time_sync_packet))
+            return
+        next_time_sync = now_mono + TIME_SYNC_MIN_INTERVAL
         stats['time_syncs_sent'] += 1
-        print(f"⏰ Time sync sent: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+        log.debug("⏰ Time sync sent: %04d-%02d-%02d %02d:%02d:%02d", *now)
         
+    except BlockingIOError:
+        # TX buffer is full, retry after the next packet
+        log.debug("⏰ Time sync skipped, UART busy")
     except Exception as e:
-        print(f"❌ Error sending time sync: {e}")
+        log.error("❌ Error sending time sync: %s", e)
+
+def get_timestamp():
+    """
+    Get the ISO 8601 string for the current second
+    
+    The string is only re-formatted when the wall-clock second changes.
+    """
+    global timestamp_cache
+    
+    now_s = int(time.time())
+    cache = timestamp_cache
+    if cache[0] != now_s:
+        cache = (now_s, datetime.fromtimestamp(now_s).isoformat())
+        timestamp_cache = cache
+    return cache[1]
 
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     global running
     print("\n\n⚠️  Shutting down gracefully...")
     running = False
+    # Let the reader finish its current read before the port is closed
+    if reader_thread:
+        reader_thread.join(UART_TIMEOUT + 1)
     if ser and ser.is_open:
         ser.close()
     print("✅ UART port closed")
+    session.close()
+    log_listener.stop()
     print_statistics()
     sys.exit(0)
 
@@ -97,7 +210,8 @@ def print_statistics():
     print(f"Packets Sent to Server: {stats['packets_sent']}")
     print(f"Errors: {stats['errors']}")
     if stats['last_packet_time']:
-        print(f"Last Packet: {stats['last_packet_time']}")
+        last_packet = time.localtime(stats['last_packet_time'])
+        print(f"Last Packet: {time.strftime('%Y-%m-%d %H:%M:%S', last_packet)}")
     print("="*60 + "\n")
 
 def parse_packet(data):
@@ -109,29 +223,38 @@ def parse_packet(data):
     
     Returns dict with parsed data or None if invalid
     """
-    if len(data) < 13:  # Minimum packet size
-        print(f"❌ Packet too short: {len(data)} bytes")
+    if len(data) < PACKET_HEADER.size:  # Minimum packet size
+        log.warning("❌ Packet too short: %d bytes", len(data))
         return None
     
     try:
-        # Extract header
-        # Device ID may not be valid UTF-8, try to decode, fallback to hex
-        try:
-            # Decode and remove all null bytes (not just trailing ones)
-            device_id = data[0:10].decode('utf-8', errors='ignore').replace('\x00', '').strip()
-            if not device_id:  # If empty after removing nulls, use hex
-                device_id = data[0:10].hex()
-        except UnicodeDecodeError:
-            # If not valid UTF-8, use hex representation
-            device_id = data[0:10].hex()
-            print(f"⚠️  Device ID not UTF-8, using hex: {device_id}")
+        # Extract header in one call (memoryview slice avoids copying the payload)
+        device_id_bytes, frame_counter, port = PACKET_HEADER.unpack_from(data)
+        
+        # Drop packets the server would reject before building anything
+        payload_size = PACKET_PAYLOAD_SIZES[port]
+        if not payload_size:
+            log.warning("❌ Unknown packet port: %d", port)
+            return None
+        if len(data) - PACKET_HEADER.size < payload_size:
+            log.warning("❌ %s payload too short: %d bytes (need %d)",
+                        PACKET_TYPE_NAMES[port], len(data) - PACKET_HEADER.size, payload_size)
+            return None
         
-        frame_counter = int.from_bytes(data[10:12], byteorder='little')
-        port = data[12]
-        payload = data[13:]
+        payload = memoryview(data)[PACKET_HEADER.size:]
+        
+        # Device ID is normally null-padded ASCII; garbled IDs keep whatever
+        # ASCII survives, fallback to hex if nothing printable. The fast path
+        # only skips the NUL removal when trailing padding is the only NULs.
+        id_head = device_id_bytes.rstrip(b'\x00')
+        if id_head.isascii() and b'\x00' not in id_head:
+            device_id = id_head.decode('ascii').strip()
+        else:
+            device_id = device_id_bytes.decode('ascii', errors='ignore').replace('\x00', '').strip()
+        if not device_id:
+            device_id = device_id_bytes.hex()
         
-        packet_type_names = {1: "Realtime", 2: "ECG", 3: "Fall Event"}
-        packet_type_name = packet_type_names.get(port, "Unknown")
+        packet_type_name = PACKET_TYPE_NAMES[port]
         
         return {
             'device_id': device_id,
@@ -142,10 +265,101 @@ def parse_packet(data):
             'payload_length': len(payload)
         }
     except Exception as e:
-        print(f"❌ Error parsing packet: {e}")
-        print(f"   Raw data (first 20 bytes): {data[:20].hex()}")
+        log.error("❌ Error parsing packet: %s (first 20 bytes: %s)", e, data[:20].hex())
         return None
 
+def parse_frames(buffer):
+    """
+    Extract every complete LoRa frame from the UART receive buffer
+    
+    Frame format from Vision Master:
+    [0xAA] [Length (1 byte)] [RSSI + 150] [SNR + 20] [Packet (Length bytes)] [0x55]
+    
+    Consumed bytes (frames and skipped noise) are removed from buffer in
+    place; an incomplete trailing frame is kept for the next call.
+    
+    Returns list of (packet_bytes, rssi, snr) tuples
+    """
+    frames = []
+    # pos tracks how far the buffer has been consumed so it is trimmed once
+    pos = 0
+    
+    while True:
+        match = FRAME_START_PATTERN.search(buffer, pos)
+        if not match:
+            # Keep a trailing start byte whose header is still arriving
+            start = buffer.find(b'\xAA', max(len(buffer) - 3, pos))
+            pos = start if start >= 0 else len(buffer)
+            break
+        
+        start = match.start()
+        length, rssi_encoded, snr_encoded = FRAME_HEADER.unpack_from(buffer, start)
+        end = start + FRAME_HEADER_SIZE + length
+        
+        if end >= len(buffer):
+            # Wait for the rest of the frame
+            pos = start
+            break
+        
+        if buffer[end] != FRAME_END:
+            log.warning("⚠️  Invalid packet frame (end=%02x)", buffer[end])
+            pos = start + 1
+            continue
+        
+        # Copy the packet out once through a view (slicing the bytearray
+        # directly would copy it twice)
+        with memoryview(buffer) as view:
+            packet_bytes = bytes(view[start + FRAME_HEADER_SIZE:end])
+        frames.append((packet_bytes, rssi_encoded - RSSI_OFFSET, snr_encoded - SNR_OFFSET))
+        pos = end + 1
+    
+    del buffer[:pos]
+    return frames
+
+def packet_to_json(packet_info, rssi):
+    """Build the JSON object the server expects for one packet"""
+    # Encode payload as base64 straight from the memoryview (no copy);
+    # base64 output is pure ASCII
+    payload_base64 = base64.b64encode(packet_info['payload']).decode('ascii')
+    
+    return {
+        'device_id': packet_info['device_id'],
+        'packet_type': packet_info['packet_type'],
+        'data': payload_base64,
+        'timestamp': get_timestamp(),
+        'frame_counter': packet_info['frame_counter'],
+        'rssi': rssi
+    }
+
+def packet_to_headers(packet_info, rssi):
+    """Build the headers carrying packet metadata for the binary endpoint"""
+    return {
+        'Content-Type': 'application/octet-stream',
+        # Percent-encoded: IDs may hold spaces or control bytes that are not
+        # valid in a raw header value
+        'X-Device-Id': quote(packet_info['device_id'], safe=''),
+        'X-Packet-Type': str(packet_info['packet_type']),
+        'X-Timestamp': get_timestamp(),
+        'X-Frame-Counter': str(packet_info['frame_counter']),
+        'X-RSSI': str(rssi)
+    }
+
+def post_to_server(url, data, headers=None):
+    """
+    POST a request body (already serialized) to the backend server
+    
+    Returns the response, or None if the request failed (error is logged)
+    """
+    try:
+        return session.post(url, data=data, headers=headers, timeout=5)
+    except requests.exceptions.Timeout:
+        log.error("   ❌ Server timeout")
+    except requests.exceptions.ConnectionError:
+        log.error("   ❌ Cannot connect to server")
+    except Exception as e:
+        log.error("   ❌ Error sending to server: %s", e)
+    return None
+
 def send_to_server(packet_info, rssi=-100, snr=0):
     """
     Send packet data to backend server via HTTP POST
@@ -155,50 +369,122 @@ def send_to_server(packet_info, rssi=-100, snr=0):
         rssi: Received Signal Strength Indicator (dBm)
         snr: Signal-to-Noise Ratio (dB)
     """
-    try:
-        # Encode payload as base64
-        payload_base64 = base64.b64encode(packet_info['payload']).decode('utf-8')
-        
-        # Create JSON payload matching the server's expected format
-        json_data = {
-            'device_id': packet_info['device_id'],
-            'packet_type': packet_info['packet_type'],
-            'data': payload_base64,
-            'timestamp': datetime.now().isoformat(),
-            'frame_counter': packet_info['frame_counter'],
-            'rssi': rssi
-        }
-        
-        # Send POST request
-        response = requests.post(
-            SERVER_URL,
-            json=json_data,
-            headers={'Content-Type': 'application/json'},
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            print(f"   ✅ Sent to server (HTTP {response.status_code})")
-            stats['packets_sent'] += 1
-            return True
-        else:
-            print(f"   ❌ Server error: HTTP {response.status_code}")
-            print(f"      Response: {response.text}")
-            stats['errors'] += 1
-            return False
-            
-    except requests.exceptions.Timeout:
-        print("   ❌ Server timeout")
+    # Raw payload bytes with metadata in headers: no base64/JSON encoding
+    response = post_to_server(SERVER_BINARY_URL, bytes(packet_info['payload']),
+                              packet_to_headers(packet_info, rssi))
+    
+    if response is None:
         stats['errors'] += 1
         return False
-    except requests.exceptions.ConnectionError:
-        print("   ❌ Cannot connect to server")
-        stats['errors'] += 1
+    if response.status_code == 200:
+        log.debug("   ✅ Sent to server (HTTP %d)", response.status_code)
+        stats['packets_sent'] += 1
+        return True
+    
+    log.error("   ❌ Server error: HTTP %d, response: %s", response.status_code, response.text)
+    stats['errors'] += 1
+    return False
+
+def send_batch_to_server(batch):
+    """
+    Send several packets to backend server in a single HTTP POST
+    
+    Args:
+        batch: List of (packet_info, rssi, snr) tuples
+    """
+    json_data = [packet_to_json(packet_info, rssi) for packet_info, rssi, snr in batch]
+    response = post_to_server(SERVER_BATCH_URL, orjson.dumps(json_data))
+    
+    if response is None:
+        stats['errors'] += len(batch)
         return False
-    except Exception as e:
-        print(f"   ❌ Error sending to server: {e}")
+    if response.status_code == 200:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        # Anything but the server's JSON object (e.g. a proxy error page)
+        # counts as the whole batch failing
+        failed = body.get('failed', 0) if isinstance(body, dict) else len(batch)
+        if not isinstance(failed, int):
+            failed = len(batch)
+        log.debug("   ✅ Sent %d packets to server (HTTP %d)", len(batch), response.status_code)
+        if failed:
+            log.warning("   ⚠️  Server rejected %d of %d batched packets", failed, len(batch))
+        stats['packets_sent'] += len(batch) - failed
+        stats['errors'] += failed
+        return not failed
+    
+    log.error("   ❌ Server error: HTTP %d, response: %s", response.status_code, response.text)
+    stats['errors'] += len(batch)
+    return False
+
+def upload_packets():
+    """Send packets queued by the UART reader thread to the backend server"""
+    while running:
+        try:
+            batch = [upload_queue.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        
+        # Packets that queued up during the previous POST go out together
+        while len(batch) < UPLOAD_BATCH_SIZE:
+            try:
+                batch.append(upload_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        if len(batch) == 1:
+            send_to_server(*batch[0])
+        else:
+            send_batch_to_server(batch)
+
+def handle_frame(data_bytes, rssi, snr):
+    """
+    Parse a validated LoRa frame, forward it to the server and send time sync
+    
+    Args:
+        data_bytes: Packet data between the frame header and end marker
+        rssi: Received Signal Strength Indicator (dBm)
+        snr: Signal-to-Noise Ratio (dB)
+    """
+    packet_info = parse_packet(data_bytes)
+    if not packet_info:
+        return
+    
+    stats['packets_received'] += 1
+    # Keep the raw epoch time; it is only formatted for the statistics
+    stats['last_packet_time'] = time.time()
+    
+    log.info(
+        "📦 Packet #%d device=%s type=%s (port %d) frame=%d rssi=%d dBm snr=%d dB size=%d",
+        stats['packets_received'], packet_info['device_id'],
+        packet_info['packet_type_name'], packet_info['packet_type'],
+        packet_info['frame_counter'], rssi, snr, packet_info['payload_length']
+    )
+    
+    # Show payload hex for debugging
+    if packet_info['packet_type'] == 3:
+        log.warning("   🚨 FALL EVENT DETECTED! Payload (hex): %s", packet_info['payload'].hex())
+    
+    # Add RSSI/SNR to packet info
+    packet_info['rssi'] = rssi
+    
+    # Hand off to the main thread so the UART keeps draining during HTTP
+    try:
+        upload_queue.put_nowait((packet_info, rssi, snr))
+    except queue.Full:
+        # Server is falling behind - drop the oldest packet to keep data current
+        try:
+            upload_queue.get_nowait()
+        except queue.Empty:
+            pass
+        upload_queue.put_nowait((packet_info, rssi, snr))
+        log.error("   ❌ Upload queue full, oldest packet dropped")
         stats['errors'] += 1
-        return False
+    
+    # Send time sync after packets (rate limited)
+    send_time_sync()
 
 def read_lora_packets():
     """
@@ -219,117 +505,57 @@ def read_lora_packets():
     print("="*60 + "\n")
     
     buffer = bytearray()
-    consecutive_failures = 0
-    MAX_CONSECUTIVE_FAILURES = 10
+    # Reads land in one reusable scratch buffer instead of a new bytes each time
+    scratch = memoryview(bytearray(UART_READ_SIZE))
+    last_traceback_time = float('-inf')
+    selector = selectors.DefaultSelector()
+    selector_port = None
     
     while running:
         try:
-            # Check for incoming data
-            if ser and ser.is_open and ser.in_waiting > 0:
-                first_byte = ser.read(1)
-                
-                if first_byte == b'\xAA':
-                    # Start of LoRa packet frame
-                    # Format: [0xAA][LEN][RSSI][SNR][DATA...][0x55]
-                    
-                    # Read header bytes with short timeout
-                    header_data = ser.read(3) if ser.in_waiting >= 3 else b''
-                    
-                    # If not enough bytes yet, wait briefly
-                    if len(header_data) < 3:
-                        time.sleep(0.05)
-                        header_data += ser.read(3 - len(header_data))
-                    
-                    if len(header_data) == 3:
-                        length = header_data[0]
-                        rssi_encoded = header_data[1]
-                        snr_encoded = header_data[2]
-                        
-                        # Validate length (reasonable packet size)
-                        if length < 13 or length > 255:
-                            print(f"⚠️  Invalid packet length: {length}")
-                            consecutive_failures += 1
-                            continue
-                        
-                        # Wait for complete packet data + end marker
-                        bytes_needed = length + 1
-                        packet_data = b''
-                        timeout_counter = 0
-                        
-                        while len(packet_data) < bytes_needed and timeout_counter < 300:
-                            available = ser.in_waiting
-                            if available > 0:
-                                chunk = ser.read(min(available, bytes_needed - len(packet_data)))
-                                packet_data += chunk
-                            else:
-                                time.sleep(0.01)
-                                timeout_counter += 1
-                        
-                        if len(packet_data) == bytes_needed:
-                            # Split data and end marker
-                            data_bytes = packet_data[:-1]
-                            end_marker = packet_data[-1:]
-                            
-                            if end_marker == b'\x55' and len(data_bytes) == length:
-                                # Decode RSSI/SNR
-                                rssi = rssi_encoded - 150
-                                snr = snr_encoded - 20
-                                
-                                # Reset failure counter on success
-                                consecutive_failures = 0
-                                
-                                # Parse packet
-                                packet_info = parse_packet(data_bytes)
-                                if packet_info:
-                                    stats['packets_received'] += 1
-                                    stats['last_packet_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                    
-                                    print(f"\n📦 Packet #{stats['packets_received']}")
-                                    print(f"   Device: {packet_info['device_id']}")
-                                    print(f"   Type: {packet_info['packet_type_name']} (Port {packet_info['packet_type']})")
-                                    print(f"   Frame: {packet_info['frame_counter']}")
-                                    print(f"   RSSI: {rssi} dBm, SNR: {snr} dB")
-                                    print(f"   Size: {packet_info['payload_length']} bytes")
-                                    
-                                    # Show payload hex for debugging
-                                    if packet_info['packet_type'] == 3:
-                                        print(f"   🚨 FALL EVENT DETECTED!")
-                                        print(f"   Payload (hex): {packet_info['payload'].hex()}")
-                                    
-                                    # Add RSSI/SNR to packet info
-                                    packet_info['rssi'] = rssi
-                                    
-                                    # Send to server
-                                    send_to_server(packet_info)
-                                    
-                                    # Send time sync after each packet
-                                    send_time_sync()
-                            else:
-                                print(f"⚠️  Invalid packet frame (end={end_marker.hex() if end_marker else 'empty'})")
-                                consecutive_failures += 1
-                        else:
-                            print(f"⚠️  Timeout waiting for packet data (got {len(packet_data)}/{bytes_needed})")
-                            consecutive_failures += 1
-                    else:
-                        print(f"⚠️  Could not read header (got {len(header_data)}/3 bytes)")
-                        consecutive_failures += 1
-                        
-                elif first_byte == b'\x55':
-                    # Orphaned end marker - we're out of sync
-                    # This is normal on startup, ignore silently unless it persists
-                    pass
-                else:
-                    # Unknown byte - could be noise or we're mid-packet
-                    pass
-                
-                # If too many failures, clear buffer to resync
-                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                    print("⚠️  Too many packet failures, resynchronizing...")
-                    ser.reset_input_buffer()
-                    consecutive_failures = 0
-                    time.sleep(0.5)
+            if not (ser and ser.is_open):
+                time.sleep(UART_TIMEOUT)
+                continue
             
-            time.sleep(0.005)  # Reduced from 0.01 for faster response
+            # (Re)register the UART after it was opened or reconnected
+            if selector_port is not ser:
+                selector.close()
+                selector = selectors.DefaultSelector()
+                selector.register(ser.fileno(), selectors.EVENT_READ)
+                selector_port = ser
+            
+            # Sleep in the kernel until bytes arrive or UART_TIMEOUT expires,
+            # then drain what the driver has straight from the fd in one call
+            if selector.select(timeout=UART_TIMEOUT):
+                try:
+                    n = os.readv(ser.fileno(), [scratch])
+                except BlockingIOError:
+                    continue
+                if not n:
+                    raise serial.SerialException(
+                        'device reports readiness to read but returned no data '
+                        '(device disconnected or multiple access on port?)')
+                buffer += scratch[:n]
+            elif buffer:
+                # Line went idle with a partial frame buffered - the start
+                # byte was noise, skip it so the parser can resync
+                del buffer[:1]
+            else:
+                continue
+            
+            # Forward every complete frame in the buffer. parse_frames has
+            # already trimmed them, so one bad frame must not drop the rest
+            for data_bytes, rssi, snr in parse_frames(buffer):
+                try:
+                    handle_frame(data_bytes, rssi, snr)
+                except Exception as e:
+                    stats['errors'] += 1
+                    now = time.monotonic()
+                    if now - last_traceback_time >= TRACEBACK_INTERVAL:
+                        log.exception("❌ Error handling frame: %s", e)
+                        last_traceback_time = now
+                    else:
+                        log.error("❌ Error handling frame: %s", e)
             
         except serial.SerialException as e:
             print(f"❌ UART error: {e}")
@@ -350,6 +576,7 @@ def read_lora_packets():
                 )
                 ser.reset_input_buffer()
                 ser.reset_output_buffer()
+                enable_low_latency(ser)
                 print("   ✅ Reconnected successfully")
             except Exception as reconnect_error:
                 print(f"   ❌ Reconnection failed: {reconnect_error}")
@@ -377,6 +604,7 @@ def read_lora_packets():
                     )
                     ser.reset_input_buffer()
                     ser.reset_output_buffer()
+                    enable_low_latency(ser)
                     print("   ✅ Reconnected successfully")
                 except Exception as reconnect_error:
                     print(f"   ❌ Reconnection failed: {reconnect_error}")
@@ -390,15 +618,23 @@ def read_lora_packets():
                 stats['errors'] += 1
                 time.sleep(1)
         except Exception as e:
-            print(f"❌ Unexpected error: {e}")
-            import traceback
-            traceback.print_exc()
             stats['errors'] += 1
+            # A persistent bug would otherwise flood stderr with tracebacks
+            now = time.monotonic()
+            if now - last_traceback_time >= TRACEBACK_INTERVAL:
+                print(f"❌ Unexpected error: {e}")
+                traceback.print_exc()
+                last_traceback_time = now
             time.sleep(1)
+    
+    selector.close()
 
 def main():
     """Main function"""
-    global ser
+    global ser, reader_thread
+    
+    # Start writing queued log records
+    log_listener.start()
     
     # Set up signal handler for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
@@ -425,6 +661,8 @@ def main():
         ser.reset_input_buffer()
         ser.reset_output_buffer()
         
+        enable_low_latency(ser)
+        
     except serial.SerialException as e:
         print(f"❌ Failed to open UART port: {e}")
         print("\nTroubleshooting:")
@@ -437,7 +675,7 @@ def main():
     # Test server connection
     try:
         print(f"\n🔗 Testing server connection...")
-        response = requests.get(SERVER_URL.replace('/api/sensor-data', '/health'), timeout=3)
+        response = session.get(SERVER_URL.replace('/api/sensor-data', '/health'), timeout=3)
         if response.status_code == 200:
             print(f"✅ Server is reachable")
         else:
@@ -446,12 +684,18 @@ def main():
         print(f"❌ Cannot reach server at {SERVER_URL}")
         print("   Make sure Docker containers are running: docker ps")
     
-    # Start reading packets
-    read_lora_packets()
+    # Read packets on a dedicated thread so network stalls never block the UART
+    reader_thread = threading.Thread(target=read_lora_packets, name='uart-reader', daemon=True)
+    reader_thread.start()
+    
+    # Upload packets until shutdown
+    upload_packets()
     
     # Cleanup
     if ser and ser.is_open:
         ser.close()
+    session.close()
+    log_listener.stop()
     print_statistics()
 
 if __name__ == '__main__':